@@ -8,17 +8,34 @@ Salve este arquivo como: python-api/main.py
 """
 
 import asyncio
-import aiohttp
-import requests
-import xml.etree.ElementTree as ET
+import httpx
 from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse
 import hashlib
-import json
+import io
+import logging
+import logging.handlers
 import os
-from scholarly import scholarly
+import queue
+import re
+import orjson
+from lxml import etree
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+
+# Logging assíncrono: o handler só enfileira; uma thread de fundo drena a fila,
+# então o caminho da request não bloqueia no flush do stdout
+_log_queue = queue.Queue(-1)
+logger = logging.getLogger('acad')
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
 
 # Configuração do Redis (opcional - funciona sem)
 try:
@@ -26,30 +43,94 @@ try:
     redis_url = os.getenv('REDIS_URL', None)
     if redis_url:
         redis_client = redis.from_url(redis_url, decode_responses=True)
-        print("✅ Redis conectado!")
+        logger.info("✅ Redis conectado!")
     else:
         redis_client = None
-        print("⚠️  Redis não configurado (cache desabilitado)")
+        logger.info("⚠️  Redis não configurado (cache desabilitado)")
 except ImportError:
     redis_client = None
-    print("⚠️  Redis não instalado (cache desabilitado)")
+    logger.info("⚠️  Redis não instalado (cache desabilitado)")
 
 app = FastAPI(
     title="Academic Research Bot - Free Edition",
     description="Busca artigos científicos em 6+ fontes gratuitas",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+
+@app.on_event("startup")
+async def startup_http_session():
+    """Cria um único cliente HTTP compartilhado (HTTP/2 multiplexa as chamadas por host)"""
+    # Com transport explícito o httpx ignora o limits= do cliente,
+    # então o pool é configurado aqui dentro
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=10.0,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=40)
+        )
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_http_session():
+    await app.state.http.aclose()
+
 # ==========================================
 # FUNÇÕES DE BUSCA
 # ==========================================
 
+# Constantes e regexes compilados uma vez (o /search passa por eles a cada request)
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_DOI_RE = re.compile(r'10\.\d{4,}/\S+')
+_WS_RE = re.compile(r'\s+')
+_NONWORD_RE = re.compile(r'\W+')
+
+# Limites de requisição por host (evita 429 e os retries/backoffs que eles custam)
+LIMITERS = {
+    'eutils.ncbi.nlm.nih.gov': AsyncLimiter(3, 1),    # PubMed: 3 req/s sem API key
+    'api.semanticscholar.org': AsyncLimiter(1, 1),
+    'api.openalex.org': AsyncLimiter(10, 1),
+    'export.arxiv.org': AsyncLimiter(1, 3),           # arXiv pede 1 req a cada 3s
+}
+
+
+async def limited_get(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """GET respeitando o rate-limit do host de destino"""
+    async with LIMITERS[urlparse(url).netloc]:
+        return await client.get(url, **kwargs)
+
+
+# Máximo de buscas simultâneas por fonte: usuários concorrentes entram na fila
+# em vez de estourar o pool de conexões (TCPConnector limit=100)
+SEMAPHORES = {
+    'semantic': asyncio.Semaphore(8),
+    'openalex': asyncio.Semaphore(16),
+    'pubmed': asyncio.Semaphore(4),
+    'arxiv': asyncio.Semaphore(4),
+    'scholar': asyncio.Semaphore(2),
+}
+
+
+async def guarded(name: str, coro):
+    """Executa a busca segurando o semáforo da fonte"""
+    async with SEMAPHORES[name]:
+        return await coro
+
+
 def search_google_scholar(query: str, num_results: int = 10) -> List[Dict]:
     """Busca no Google Scholar via Scholarly"""
     results = []
-    print(f"🔍 Buscando no Google Scholar: {query}")
+    logger.info(f"🔍 Buscando no Google Scholar: {query}")
     
     try:
+        # Import preguiçoso: scholarly arrasta requests/bs4 e só pesa o boot
+        # de quem nunca pede a fonte "scholar"
+        from scholarly import scholarly
+
         search_query = scholarly.search_pubs(query)
         
         for i, pub in enumerate(search_query):
@@ -67,20 +148,20 @@ def search_google_scholar(query: str, num_results: int = 10) -> List[Dict]:
                 'citations': pub.get('num_citations', 0),
                 'venue': bib.get('venue', 'N/A')
             })
-            print(f"  ✓ Artigo {i+1}: {bib.get('title', 'N/A')[:50]}...")
+            logger.debug(f"  ✓ Artigo {i+1}: {bib.get('title', 'N/A')[:50]}...")
             
     except Exception as e:
-        print(f"  ❌ Erro Google Scholar: {e}")
+        logger.error(f"  ❌ Erro Google Scholar: {e}")
     
-    print(f"  📊 Total Google Scholar: {len(results)} artigos")
+    logger.info(f"  📊 Total Google Scholar: {len(results)} artigos")
     return results
 
 
-def search_pubmed(query: str, num_results: int = 10) -> List[Dict]:
+async def search_pubmed_async(client: httpx.AsyncClient, query: str, num_results: int = 10) -> List[Dict]:
     """Busca no PubMed (API oficial)"""
     results = []
-    print(f"🔍 Buscando no PubMed: {query}")
-    
+    logger.info(f"🔍 Buscando no PubMed: {query}")
+
     try:
         # Buscar IDs
         search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
@@ -90,15 +171,15 @@ def search_pubmed(query: str, num_results: int = 10) -> List[Dict]:
             'retmax': num_results,
             'retmode': 'json'
         }
-        
-        response = requests.get(search_url, params=params, timeout=10)
-        data = response.json()
+
+        response = await limited_get(client, search_url, params=params)
+        data = orjson.loads(response.content)
         ids = data.get('esearchresult', {}).get('idlist', [])
-        
+
         if not ids:
-            print(f"  ⚠️  Nenhum resultado no PubMed")
+            logger.info(f"  ⚠️  Nenhum resultado no PubMed")
             return results
-        
+
         # Buscar detalhes
         fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
         params = {
@@ -106,31 +187,28 @@ def search_pubmed(query: str, num_results: int = 10) -> List[Dict]:
             'id': ','.join(ids),
             'retmode': 'xml'
         }
-        
-        response = requests.get(fetch_url, params=params, timeout=10)
-        root = ET.fromstring(response.content)
-        
-        for article in root.findall('.//PubmedArticle'):
+
+        response = await limited_get(client, fetch_url, params=params)
+        body = response.content
+
+        # Parser C do lxml em streaming: não retém o DOM inteiro em memória
+        for _, article in etree.iterparse(io.BytesIO(body), tag='PubmedArticle'):
+            if len(results) >= num_results:
+                break
             try:
-                title_elem = article.find('.//ArticleTitle')
-                title = title_elem.text if title_elem is not None else 'N/A'
-                
+                title = article.findtext('.//ArticleTitle') or 'N/A'
+
                 authors = []
                 for author in article.findall('.//Author'):
-                    lastname = author.find('LastName')
-                    forename = author.find('ForeName')
-                    if lastname is not None and forename is not None:
-                        authors.append(f"{forename.text} {lastname.text}")
-                
-                abstract_elem = article.find('.//AbstractText')
-                abstract = abstract_elem.text if abstract_elem is not None else 'N/A'
-                
-                year_elem = article.find('.//PubDate/Year')
-                year = year_elem.text if year_elem is not None else 'N/A'
-                
-                pmid_elem = article.find('.//PMID')
-                pmid = pmid_elem.text if pmid_elem is not None else 'N/A'
-                
+                    lastname = author.findtext('LastName')
+                    forename = author.findtext('ForeName')
+                    if lastname and forename:
+                        authors.append(f"{forename} {lastname}")
+
+                abstract = article.findtext('.//AbstractText') or 'N/A'
+                year = article.findtext('.//PubDate/Year') or 'N/A'
+                pmid = article.findtext('.//PMID') or 'N/A'
+
                 results.append({
                     'source': 'PubMed',
                     'title': title,
@@ -141,22 +219,26 @@ def search_pubmed(query: str, num_results: int = 10) -> List[Dict]:
                     'citations': 'N/A',
                     'venue': 'PubMed'
                 })
-                
+
             except Exception as e:
                 continue
-                
+            finally:
+                article.clear()
+                while article.getprevious() is not None:
+                    del article.getparent()[0]
+
     except Exception as e:
-        print(f"  ❌ Erro PubMed: {e}")
+        logger.error(f"  ❌ Erro PubMed: {e}")
     
-    print(f"  📊 Total PubMed: {len(results)} artigos")
+    logger.info(f"  📊 Total PubMed: {len(results)} artigos")
     return results
 
 
-def search_arxiv(query: str, num_results: int = 10) -> List[Dict]:
+async def search_arxiv_async(client: httpx.AsyncClient, query: str, num_results: int = 10) -> List[Dict]:
     """Busca no arXiv (API oficial)"""
     results = []
-    print(f"🔍 Buscando no arXiv: {query}")
-    
+    logger.info(f"🔍 Buscando no arXiv: {query}")
+
     try:
         url = "http://export.arxiv.org/api/query"
         params = {
@@ -164,30 +246,26 @@ def search_arxiv(query: str, num_results: int = 10) -> List[Dict]:
             'start': 0,
             'max_results': num_results
         }
-        
-        response = requests.get(url, params=params, timeout=10)
-        root = ET.fromstring(response.content)
-        
-        namespace = {'atom': 'http://www.w3.org/2005/Atom'}
-        
-        for entry in root.findall('atom:entry', namespace):
-            title_elem = entry.find('atom:title', namespace)
-            title = title_elem.text.strip() if title_elem is not None else 'N/A'
-            
-            authors = [
-                author.find('atom:name', namespace).text
-                for author in entry.findall('atom:author', namespace)
-            ]
-            
-            summary_elem = entry.find('atom:summary', namespace)
-            summary = summary_elem.text.strip() if summary_elem is not None else 'N/A'
-            
-            published_elem = entry.find('atom:published', namespace)
-            published = published_elem.text[:4] if published_elem is not None else 'N/A'
-            
-            link_elem = entry.find('atom:id', namespace)
-            link = link_elem.text if link_elem is not None else 'N/A'
-            
+
+        # gzip corta ~5x os bytes do Atom; o httpx descomprime sozinho
+        response = await limited_get(
+            client, url, params=params,
+            headers={'Accept-Encoding': 'gzip, deflate'}
+        )
+        body = response.content
+
+        # Parser C do lxml em streaming, entry por entry
+        for _, entry in etree.iterparse(io.BytesIO(body), tag=f'{_ATOM}entry'):
+            title = (entry.findtext(f'{_ATOM}title') or 'N/A').strip()
+            summary = (entry.findtext(f'{_ATOM}summary') or 'N/A').strip()
+
+            published = entry.findtext(f'{_ATOM}published')
+            published = published[:4] if published else 'N/A'
+
+            link = entry.findtext(f'{_ATOM}id') or 'N/A'
+
+            authors = [name.text for name in entry.iter(f'{_ATOM}name')]
+
             results.append({
                 'source': 'arXiv',
                 'title': title,
@@ -198,19 +276,20 @@ def search_arxiv(query: str, num_results: int = 10) -> List[Dict]:
                 'citations': 'N/A',
                 'venue': 'arXiv Preprint'
             })
-            
+            entry.clear()
+
     except Exception as e:
-        print(f"  ❌ Erro arXiv: {e}")
+        logger.error(f"  ❌ Erro arXiv: {e}")
     
-    print(f"  📊 Total arXiv: {len(results)} artigos")
+    logger.info(f"  📊 Total arXiv: {len(results)} artigos")
     return results
 
 
-async def search_semantic_scholar_async(query: str, num_results: int = 10) -> List[Dict]:
+async def search_semantic_scholar_async(client: httpx.AsyncClient, query: str, num_results: int = 10) -> List[Dict]:
     """Busca no Semantic Scholar"""
     results = []
-    print(f"🔍 Buscando no Semantic Scholar: {query}")
-    
+    logger.info(f"🔍 Buscando no Semantic Scholar: {query}")
+
     try:
         url = "https://api.semanticscholar.org/graph/v1/paper/search"
         params = {
@@ -218,37 +297,36 @@ async def search_semantic_scholar_async(query: str, num_results: int = 10) -> Li
             'limit': num_results,
             'fields': 'title,authors,year,abstract,citationCount,url,venue'
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                data = await response.json()
-                
-                for paper in data.get('data', []):
-                    authors = [a.get('name', '') for a in paper.get('authors', [])]
-                    
-                    results.append({
-                        'source': 'Semantic Scholar',
-                        'title': paper.get('title', 'N/A'),
-                        'authors': ', '.join(authors),
-                        'year': str(paper.get('year', 'N/A')),
-                        'abstract': (paper.get('abstract', 'N/A') or 'N/A')[:500],
-                        'url': paper.get('url', 'N/A'),
-                        'citations': paper.get('citationCount', 0),
-                        'venue': paper.get('venue', 'N/A')
-                    })
-                    
+
+        response = await limited_get(client, url, params=params)
+        data = orjson.loads(response.content)
+
+        for paper in data.get('data', []):
+            authors = [a.get('name', '') for a in paper.get('authors', [])]
+
+            results.append({
+                'source': 'Semantic Scholar',
+                'title': paper.get('title', 'N/A'),
+                'authors': ', '.join(authors),
+                'year': str(paper.get('year', 'N/A')),
+                'abstract': (paper.get('abstract', 'N/A') or 'N/A')[:500],
+                'url': paper.get('url', 'N/A'),
+                'citations': paper.get('citationCount', 0),
+                'venue': paper.get('venue', 'N/A')
+            })
+
     except Exception as e:
-        print(f"  ❌ Erro Semantic Scholar: {e}")
+        logger.error(f"  ❌ Erro Semantic Scholar: {e}")
     
-    print(f"  📊 Total Semantic Scholar: {len(results)} artigos")
+    logger.info(f"  📊 Total Semantic Scholar: {len(results)} artigos")
     return results
 
 
-async def search_openalex_async(query: str, num_results: int = 10) -> List[Dict]:
+async def search_openalex_async(client: httpx.AsyncClient, query: str, num_results: int = 10) -> List[Dict]:
     """Busca no OpenAlex"""
     results = []
-    print(f"🔍 Buscando no OpenAlex: {query}")
-    
+    logger.info(f"🔍 Buscando no OpenAlex: {query}")
+
     try:
         url = "https://api.openalex.org/works"
         params = {
@@ -256,126 +334,322 @@ async def search_openalex_async(query: str, num_results: int = 10) -> List[Dict]
             'per-page': num_results,
             'mailto': 'bot@example.com'
         }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                data = await response.json()
-                
-                for work in data.get('results', []):
-                    authors = [
-                        authorship.get('author', {}).get('display_name', '')
-                        for authorship in work.get('authorships', [])
-                    ]
-                    
-                    abstract_inv = work.get('abstract_inverted_index', {})
-                    abstract = 'N/A'
-                    if abstract_inv:
-                        words = [''] * (max(max(positions) for positions in abstract_inv.values()) + 1)
-                        for word, positions in abstract_inv.items():
-                            for pos in positions:
-                                words[pos] = word
-                        abstract = ' '.join(words)[:500]
-                    
-                    results.append({
-                        'source': 'OpenAlex',
-                        'title': work.get('title', 'N/A'),
-                        'authors': ', '.join(authors[:5]),
-                        'year': str(work.get('publication_year', 'N/A')),
-                        'abstract': abstract,
-                        'url': work.get('doi', work.get('id', 'N/A')),
-                        'citations': work.get('cited_by_count', 0),
-                        'venue': work.get('host_venue', {}).get('display_name', 'N/A')
-                    })
-                    
+
+        response = await limited_get(client, url, params=params)
+        data = orjson.loads(response.content)
+
+        for work in data.get('results', []):
+            authors = [
+                authorship.get('author', {}).get('display_name', '')
+                for authorship in work.get('authorships', [])
+            ]
+
+            abstract_inv = work.get('abstract_inverted_index', {})
+            abstract = 'N/A'
+            if abstract_inv:
+                # Uma passada só pelo índice invertido (sem o max() duplo)
+                positions_map = {}
+                for word, positions in abstract_inv.items():
+                    for pos in positions:
+                        positions_map[pos] = word
+                pieces, size = [], 0
+                for pos in sorted(positions_map):
+                    pieces.append(positions_map[pos])
+                    size += len(positions_map[pos]) + 1
+                    if size >= 500:
+                        break
+                abstract = ' '.join(pieces)[:500]
+
+            results.append({
+                'source': 'OpenAlex',
+                'title': work.get('title', 'N/A'),
+                'authors': ', '.join(authors[:5]),
+                'year': str(work.get('publication_year', 'N/A')),
+                'abstract': abstract,
+                'url': work.get('doi', work.get('id', 'N/A')),
+                'citations': work.get('cited_by_count', 0),
+                'venue': work.get('host_venue', {}).get('display_name', 'N/A')
+            })
+
     except Exception as e:
-        print(f"  ❌ Erro OpenAlex: {e}")
+        logger.error(f"  ❌ Erro OpenAlex: {e}")
     
-    print(f"  📊 Total OpenAlex: {len(results)} artigos")
+    logger.info(f"  📊 Total OpenAlex: {len(results)} artigos")
     return results
 
 
-async def search_all_sources(query: str, sources: List[str] = None) -> Dict:
+# Cache L1 em memória na frente do Redis: queries quentes nem pagam a ida à rede
+_MEM = TTLCache(maxsize=1024, ttl=600)
+_KEY_LOCKS: Dict[str, asyncio.Lock] = {}
+
+
+def _norm(query: str) -> str:
+    """Normaliza a query para o cache ("AI Safety" == "ai safety" == " ai  safety ")"""
+    return _WS_RE.sub(' ', query.strip().lower())
+
+
+def _cache_key(query: str, sources: List[str], num_results: int) -> str:
+    # "v2" versiona o esquema: mudou o formato do resultado, basta trocar a tag
+    raw = f"{_norm(query)}|{','.join(sorted(sources))}|{num_results}|v2"
+    return hashlib.sha256(raw.encode()).hexdigest()[:24]
+
+
+def _source_key(source: str, query: str, num_results: int) -> str:
+    return f"acad:{source}:{_norm(query)}:{num_results}"
+
+
+# TTL por fonte: Scholar/arXiv mudam devagar, Semantic Scholar atualiza citações mais rápido
+REDIS_TTL = {
+    'scholar': 86400,
+    'arxiv': 86400,
+    'pubmed': 43200,
+    'semantic': 21600,
+    'openalex': 21600,
+}
+
+
+async def search_all_sources(query: str, sources: List[str] = None, num_results: int = 10) -> Dict:
     """Busca em múltiplas fontes"""
-    
+
     if sources is None:
         sources = ['scholar', 'pubmed', 'arxiv', 'semantic', 'openalex']
-    
+
     # Cache
-    cache_key = hashlib.md5(f"{query}:{','.join(sorted(sources))}".encode()).hexdigest()
-    
-    if redis_client:
-        try:
-            cached = redis_client.get(cache_key)
-            if cached:
-                print(f"✅ Resultado em cache!")
-                return json.loads(cached)
-        except:
-            pass
-    
-    print(f"\n{'='*60}")
-    print(f"🚀 INICIANDO BUSCA MULTI-SOURCE")
-    print(f"Query: {query}")
-    print(f"Fontes: {', '.join(sources)}")
-    print(f"{'='*60}\n")
-    
+    cache_key = _cache_key(query, sources, num_results)
+
+    cached = _MEM.get(cache_key)
+    if cached is not None:
+        logger.info(f"✅ Resultado em cache (memória)!")
+        return cached
+
+    # Lock por chave: N queries idênticas concorrentes viram UMA busca upstream
+    lock = _KEY_LOCKS.setdefault(cache_key, asyncio.Lock())
+    try:
+        async with lock:
+            cached = _MEM.get(cache_key)
+            if cached is not None:
+                return cached
+
+            results = {
+                'query': query,
+                'timestamp': datetime.now().isoformat(),
+                'sources': {},
+                'total_results': 0
+            }
+
+            # Chave Redis por fonte: quem pede um subconjunto diferente de fontes
+            # ainda aproveita o que já foi buscado
+            missing = list(sources)
+            if redis_client:
+                try:
+                    vals = redis_client.mget([_source_key(s, query, num_results) for s in sources])
+                    for source_name, val in zip(sources, vals):
+                        if val is not None:
+                            results['sources'][source_name] = orjson.loads(val)
+                    missing = [s for s in sources if s not in results['sources']]
+                    if not missing:
+                        logger.info(f"✅ Resultado em cache!")
+                except:
+                    pass
+
+            if missing:
+                fetched = await _fetch_all_sources(query, missing, num_results)
+                results['sources'].update(fetched['sources'])
+
+                if redis_client:
+                    try:
+                        pipe = redis_client.pipeline()
+                        for source_name, val in fetched['sources'].items():
+                            pipe.setex(
+                                _source_key(source_name, query, num_results),
+                                REDIS_TTL[source_name],
+                                orjson.dumps(val, default=str)
+                            )
+                        pipe.execute()
+                    except:
+                        pass
+
+            results['merged'] = _merge_results(results['sources'])
+            results['total_results'] = sum(len(v) for v in results['sources'].values())
+            _MEM[cache_key] = results
+            return results
+    finally:
+        _KEY_LOCKS.pop(cache_key, None)
+
+
+# Ordem de prioridade no merge: fontes com metadados melhores ganham
+_MERGE_PRIORITY = ['openalex', 'semantic', 'pubmed', 'arxiv', 'scholar']
+
+
+def _merge_results(sources_dict: Dict[str, List[Dict]]) -> List[Dict]:
+    """Deduplica artigos entre fontes por DOI (ou título normalizado)"""
+    seen = {}
+    for source_name in _MERGE_PRIORITY:
+        for paper in sources_dict.get(source_name, []):
+            doi = _DOI_RE.search(str(paper.get('url') or ''))
+            if doi:
+                key = doi.group(0).lower()
+            else:
+                key = _NONWORD_RE.sub('', str(paper.get('title', '')).lower())[:80]
+            if not key or key == 'na':
+                continue
+
+            existing = seen.get(key)
+            if existing is None:
+                # Cópia: o bump de citações abaixo não pode alterar as listas
+                # originais em sources_dict (nem o que já foi pro Redis)
+                seen[key] = dict(paper)
+            else:
+                # Primeira ocorrência fica; só herda a contagem maior de citações
+                try:
+                    if int(paper.get('citations', 0)) > int(existing.get('citations', 0)):
+                        existing['citations'] = paper['citations']
+                except (TypeError, ValueError):
+                    pass
+    return list(seen.values())
+
+
+# Deadline duro para o scraping do Scholar: ele leva 5-30s com frequência e
+# dominava a latência total do /search
+SCHOLAR_TIMEOUT = 4.0
+
+
+def _warm_scholarly():
+    """Prepara o processo filho: logging direto no stderr e scholarly pré-carregado"""
+    # O filho herda o QueueHandler, mas o QueueListener que drena a fila só
+    # existe no pai — sem trocar o handler, todo log do Scholar (inclusive os
+    # erros) morreria numa fila que ninguém lê
+    logger.handlers.clear()
+    logger.addHandler(logging.StreamHandler())
+
+    from scholarly import scholarly  # noqa: F401
+
+
+# O parsing de HTML do scholarly é CPU-pesado; num processo separado ele não
+# disputa o GIL com o event loop do FastAPI
+_scholar_pool = ProcessPoolExecutor(max_workers=2, initializer=_warm_scholarly)
+
+
+def _run_scholar(query: str, num_results: int):
+    """Agenda a busca do Scholar no pool de processos"""
+    return asyncio.get_running_loop().run_in_executor(
+        _scholar_pool, search_google_scholar, query, num_results
+    )
+
+
+async def _refresh_scholar_cache(query: str, num_results: int):
+    """Renova o cache do Scholar em background (stale-while-revalidate)"""
+    try:
+        res = await _run_scholar(query, num_results)
+        if redis_client and res:
+            redis_client.setex(
+                _source_key('scholar', query, num_results),
+                REDIS_TTL['scholar'],
+                orjson.dumps(res, default=str)
+            )
+    except Exception as e:
+        logger.error(f"❌ Erro ao renovar cache do Scholar: {e}")
+
+
+async def _search_scholar_bounded(query: str, num_results: int) -> List[Dict]:
+    """Scholar com deadline: no estouro devolve o cache antigo (ou vazio) na hora"""
+    try:
+        return await asyncio.wait_for(
+            _run_scholar(query, num_results),
+            timeout=SCHOLAR_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.info(f"⏱️  Scholar passou de {SCHOLAR_TIMEOUT}s; respondendo com cache e renovando em background")
+        asyncio.create_task(_refresh_scholar_cache(query, num_results))
+        if redis_client:
+            try:
+                cached = redis_client.get(_source_key('scholar', query, num_results))
+                if cached:
+                    return orjson.loads(cached)
+            except:
+                pass
+        return []
+
+
+# Singleflight por (fonte, query, n): buscas upstream idênticas em voo viram uma só
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _singleflight(key: str, make_coro):
+    """Executa a corrotina uma vez por chave; chamadas concorrentes aguardam o mesmo future"""
+    existing = _inflight.get(key)
+    if existing is not None:
+        # shield: cancelar um waiter (ex.: cliente do /search/stream caiu) não
+        # pode cancelar o future compartilhado de quem ainda espera
+        return await asyncio.shield(existing)
+
+    fut = asyncio.get_running_loop().create_future()
+    # Garante que a exceção conta como "vista" mesmo sem ninguém esperando
+    fut.add_done_callback(lambda f: f.exception() if not f.cancelled() else None)
+    _inflight[key] = fut
+    try:
+        result = await make_coro()
+        if not fut.cancelled():
+            fut.set_result(result)
+        return result
+    except BaseException as e:
+        if not fut.cancelled():
+            fut.set_exception(e)
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def _source_coros(query: str, sources: List[str], num_results: int) -> Dict[str, object]:
+    """Monta as corrotinas (singleflight + semáforo) das fontes pedidas"""
+    factories = {
+        'semantic': lambda: search_semantic_scholar_async(app.state.http, query, num_results),
+        'openalex': lambda: search_openalex_async(app.state.http, query, num_results),
+        'scholar': lambda: _search_scholar_bounded(query, num_results),
+        'pubmed': lambda: search_pubmed_async(app.state.http, query, num_results),
+        'arxiv': lambda: search_arxiv_async(app.state.http, query, num_results),
+    }
+    coros = {}
+    for name, make in factories.items():
+        if name not in sources:
+            continue
+        key = f"{name}|{_norm(query)}|{num_results}"
+        coros[name] = _singleflight(key, lambda n=name, m=make: guarded(n, m()))
+    return coros
+
+
+async def _fetch_all_sources(query: str, sources: List[str], num_results: int = 10) -> Dict:
+    """Executa a busca de fato em todas as fontes pedidas"""
+    logger.info(f"\n{'='*60}")
+    logger.info(f"🚀 INICIANDO BUSCA MULTI-SOURCE")
+    logger.info(f"Query: {query}")
+    logger.info(f"Fontes: {', '.join(sources)}")
+    logger.info(f"{'='*60}\n")
+
     results = {
         'query': query,
         'timestamp': datetime.now().isoformat(),
         'sources': {},
         'total_results': 0
     }
-    
-    # Async sources
-    tasks = []
-    if 'semantic' in sources:
-        tasks.append(('semantic', search_semantic_scholar_async(query)))
-    if 'openalex' in sources:
-        tasks.append(('openalex', search_openalex_async(query)))
-    
-    for source_name, task in tasks:
-        try:
-            results['sources'][source_name] = await task
-            results['total_results'] += len(results['sources'][source_name])
-        except Exception as e:
-            print(f"❌ Erro {source_name}: {e}")
+
+    # Todas as fontes em paralelo (síncronas rodam em threads)
+    coros = _source_coros(query, sources, num_results)
+
+    done = await asyncio.gather(*coros.values(), return_exceptions=True)
+
+    for source_name, outcome in zip(coros, done):
+        if isinstance(outcome, BaseException):
+            logger.error(f"❌ Erro {source_name}: {outcome}")
             results['sources'][source_name] = []
+        else:
+            results['sources'][source_name] = outcome
+            results['total_results'] += len(outcome)
     
-    # Sync sources
-    if 'scholar' in sources:
-        try:
-            results['sources']['scholar'] = await asyncio.to_thread(search_google_scholar, query)
-            results['total_results'] += len(results['sources']['scholar'])
-        except Exception as e:
-            print(f"❌ Erro scholar: {e}")
-            results['sources']['scholar'] = []
-    
-    if 'pubmed' in sources:
-        try:
-            results['sources']['pubmed'] = await asyncio.to_thread(search_pubmed, query)
-            results['total_results'] += len(results['sources']['pubmed'])
-        except Exception as e:
-            print(f"❌ Erro pubmed: {e}")
-            results['sources']['pubmed'] = []
-    
-    if 'arxiv' in sources:
-        try:
-            results['sources']['arxiv'] = await asyncio.to_thread(search_arxiv, query)
-            results['total_results'] += len(results['sources']['arxiv'])
-        except Exception as e:
-            print(f"❌ Erro arxiv: {e}")
-            results['sources']['arxiv'] = []
-    
-    print(f"\n{'='*60}")
-    print(f"✅ BUSCA CONCLUÍDA: {results['total_results']} artigos encontrados")
-    print(f"{'='*60}\n")
-    
-    # Salvar cache
-    if redis_client:
-        try:
-            redis_client.setex(cache_key, 86400, json.dumps(results))
-        except:
-            pass
-    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"✅ BUSCA CONCLUÍDA: {results['total_results']} artigos encontrados")
+    logger.info(f"{'='*60}\n")
+
     return results
 
 
@@ -384,10 +658,41 @@ async def search_all_sources(query: str, sources: List[str] = None) -> Dict:
 # ==========================================
 
 class SearchRequest(BaseModel):
+    # extra='forbid' + limite de tamanho: requests malformadas falham cedo,
+    # antes de qualquer parsing caro
+    model_config = ConfigDict(extra='forbid', str_max_length=256)
+
     query: str
     sources: Optional[List[str]] = None
     num_results: int = 10
 
+
+class Paper(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    source: str
+    title: str
+    authors: str
+    year: str
+    abstract: str
+    url: str
+    citations: int | str
+    venue: str
+
+
+class SearchResults(BaseModel):
+    query: str
+    timestamp: str
+    sources: Dict[str, List[Paper]]
+    merged: List[Paper] = []
+    total_results: int
+
+
+class SearchResponse(BaseModel):
+    success: bool
+    data: SearchResults
+    message: str
+
 @app.get("/")
 async def root():
     """Página inicial"""
@@ -413,23 +718,61 @@ async def health_check():
         'sources_available': ['scholar', 'pubmed', 'arxiv', 'semantic', 'openalex']
     }
 
-@app.post("/search")
+@app.post("/search", response_model=SearchResponse, response_model_exclude_none=True)
 async def search_endpoint(request: SearchRequest):
     """Busca artigos em múltiplas fontes"""
     
     try:
-        results = await search_all_sources(request.query, request.sources)
+        results = await search_all_sources(request.query, request.sources, request.num_results)
         return {
             'success': True,
             'data': results,
             'message': f'✅ Encontrados {results["total_results"]} artigos'
         }
     except Exception as e:
-        print(f"❌ ERRO CRÍTICO: {e}")
+        logger.error(f"❌ ERRO CRÍTICO: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/search/stream")
+async def search_stream_endpoint(request: SearchRequest):
+    """Busca artigos e envia cada fonte assim que ela termina (NDJSON)"""
+    query = request.query
+    sources = request.sources or ['scholar', 'pubmed', 'arxiv', 'semantic', 'openalex']
+    num_results = request.num_results
+
+    async def _run(name, coro):
+        try:
+            return name, await coro
+        except Exception as e:
+            logger.error(f"❌ Erro {name}: {e}")
+            return name, []
+
+    async def gen():
+        yield orjson.dumps({
+            'meta': {
+                'query': query,
+                'sources': sources,
+                'timestamp': datetime.now().isoformat()
+            }
+        }) + b'\n'
+
+        tasks = [_run(name, coro) for name, coro in _source_coros(query, sources, num_results).items()]
+        for fut in asyncio.as_completed(tasks):
+            name, data = await fut
+            yield orjson.dumps({'source': name, 'results': data}, default=str) + b'\n'
+
+    return StreamingResponse(gen(), media_type='application/x-ndjson')
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 2))
+    )
\ No newline at end of file